@@ -2,9 +2,12 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+import altair as alt
+import duckdb
 
 from mplsoccer import Sbopen, Pitch
-from scipy import stats  # for z-score
+
+import event_store
 
 st.set_page_config(page_title="France 2018 WC Final – Paul Pogba Analysis", layout="wide")
 
@@ -51,6 +54,31 @@ selected_match_id = france_final_df.loc[match_id, "match_id"]
 df_events, df_related, df_freeze, df_tactics = parser.event(selected_match_id)
 df_lineup = parser.lineup(selected_match_id)
 
+# Cache matches + the selected match in the Parquet event store (section 2).
+# The events are already loaded, so they are stored without a second download.
+event_store.write_matches(df_match, competition_id=43, season_id=3)
+try:
+    event_store.ingest_match(parser, selected_match_id, df_events=df_events, df_lineup=df_lineup)
+except event_store.INGEST_ERRORS as err:
+    st.warning(f"Could not cache match {selected_match_id}: {err}")
+
+
+def cache_matches(match_ids):
+    """Cache each match; warn about and skip the ones that fail to download."""
+    cached = [m for m in match_ids if event_store.has_player_stats(m)]
+    missing = [m for m in match_ids if not event_store.has_player_stats(m)]
+    if not missing:
+        return cached
+    with st.spinner("Caching matches..."):
+        for cache_match_id in missing:
+            try:
+                event_store.ingest_match(parser, cache_match_id)
+            except event_store.INGEST_ERRORS as err:
+                st.warning(f"Could not cache match {cache_match_id}: {err}")
+            else:
+                cached.append(cache_match_id)
+    return cached
+
 # Focus on France team
 teamplay_name = "France"
 df_lineup_fr = df_lineup.loc[df_lineup['team_name'] == teamplay_name].copy()
@@ -63,6 +91,48 @@ df_events_fr = df_events.loc[df_events['team_name'] == teamplay_name].copy()
 #st.header("Events Data (head)")
 #st.write(df_events_fr.head())
 
+# -----------------------------------------------------
+# 2b. SQL over the cached event store
+# -----------------------------------------------------
+# Views: events, lineups, matches, shots, recoveries, player_stats.
+# Only the matches / columns a query touches are read from disk.
+# Each query gets its own read-only connection (see event_store.run_query).
+
+DEFAULT_QUERY = """SELECT player_name,
+       count(*) AS shots,
+       sum(CASE WHEN after_recovery THEN 1 ELSE 0 END) AS shots_after_recovery,
+       round(sum(shot_statsbomb_xg), 2) AS total_xg
+FROM shots
+WHERE team_name = 'France'
+GROUP BY player_name
+ORDER BY total_xg DESC"""
+
+with st.expander("Query the event store (SQL)"):
+    if st.button("Cache all 2018 World Cup matches"):
+        cache_matches(df_match['match_id'])
+
+    st.caption(f"{len(event_store.cached_match_ids())} match(es) cached. "
+               "Views: events, lineups, matches, shots, recoveries, player_stats")
+
+    # Form, so the query only runs on submit and not on every rerun
+    with st.form("sql_query"):
+        query = st.text_area("SQL", value=DEFAULT_QUERY, height=180)
+        query_submitted = st.form_submit_button("Run query")
+
+    if query_submitted:
+        try:
+            st.session_state['query_result'] = event_store.run_query(query)
+        except (duckdb.Error, ValueError) as err:
+            st.session_state.pop('query_result', None)
+            st.error(f"Query failed: {err}")
+
+    if 'query_result' in st.session_state:
+        query_result, truncated = st.session_state['query_result']
+        if truncated:
+            st.warning(f"Showing the first {len(query_result):,} rows only. "
+                       "Add a WHERE, GROUP BY or LIMIT to narrow the result.")
+        st.dataframe(query_result)
+
 # ---------------------------------------------------
 # 3. Single-player analysis – shot map
 # ---------------------------------------------------
@@ -76,14 +146,12 @@ selected_player = st.selectbox(
 st.write("**Selected Player Info**")
 st.write(df_lineup_fr[df_lineup_fr["player_name"] == selected_player])
 
-
-df_france_event, df_related, df_freeze, df_tactics = parser.event(8658)
-
 # ------------------------------------
 # Recovery
 # ------------------------------------
 
-df_events = df_france_event.sort_values(['match_id', 'period', 'minute', 'second']).copy()
+# Same events as the selected match loaded above (no second download)
+df_events = df_events.sort_values(['match_id', 'period', 'minute', 'second']).copy()
 
 
 df_events['event_time'] = (
@@ -200,8 +268,11 @@ else:
 # My Z-score analysis
 # ---------------------------
 
+# Standardised within the selected team only, so the other side's shots
+# don't shift the mean; cross-team comparisons are in section 4.
 player_metrics = (
     shots_with_recovery
+    .loc[shots_with_recovery['team_name'] == teamplay_name]
     .groupby('player_name')
     .agg(
         total_shots = ('id', 'count'),
@@ -244,148 +315,275 @@ comparison_table = player_metrics[
     [f'z_{m}' for m in metrics_for_z]
 ]
 
+
+# Click a player in the legend to highlight them (shift-click for several)
+def player_highlight():
+    return alt.selection_point(fields=['player_name'], bind='legend')
+
+
 st.subheader("Player Comparison (Z-Score Analysis)")
 
 if comparison_table.empty:
     st.warning("No comparison data available. Select at least two valid players with events.")
-    st.stop()
-
-st.write(comparison_table.set_index('player_name').round(2))
-
-plot_df = comparison_table.set_index('player_name')
+else:
+    st.write(comparison_table.set_index('player_name').round(2))
 
-fig, ax = plt.subplots(figsize=(12, 6))
+    plot_df = comparison_table.set_index('player_name')
 
-x = np.arange(len(plot_df.columns))  # metrics
-width = 0.8 / len(plot_df.index)     # bar width based on number of players
+    # Long-format data spec for the client-side (Vega-Lite) charts below.
+    # Hover, legend clicks and highlighting all happen in the browser.
+    z_long = (
+        plot_df.reset_index()
+        .melt(id_vars='player_name', var_name='metric', value_name='z_score')
+    )
+    z_long['z_score'] = z_long['z_score'].round(3)
+
+    highlight = player_highlight()
+
+    bar_chart = (
+        alt.Chart(z_long)
+        .mark_bar()
+        .encode(
+            x=alt.X('metric:N', sort=plot_df.columns.tolist(), title=None,
+                    axis=alt.Axis(labelAngle=-45)),
+            xOffset=alt.XOffset('player_name:N'),
+            y=alt.Y('z_score:Q', title="Z-Score"),
+            color=alt.Color('player_name:N', title="Player"),
+            opacity=alt.condition(highlight, alt.value(1.0), alt.value(0.2)),
+            tooltip=['player_name', 'metric', alt.Tooltip('z_score:Q', format='.2f')],
+        )
+        .add_params(highlight)
+    )
 
-for i, player in enumerate(plot_df.index):
-    ax.bar(
-        x + i * width,
-        plot_df.loc[player].values,
-        width,
-        label=player
+    baseline = (
+        alt.Chart(pd.DataFrame({'z_score': [0]}))
+        .mark_rule(strokeDash=[4, 4])  # Z-score baseline
+        .encode(y='z_score:Q')
     )
 
-ax.axhline(0, linestyle='--')  # Z-score baseline
+    st.altair_chart(
+        (bar_chart + baseline).properties(title="Player Comparison — Z-Score Analysis", height=400),
+        width="stretch"
+    )
 
-ax.set_xticks(x + width * (len(plot_df.index) - 1) / 2)
-ax.set_xticklabels(plot_df.columns, rotation=45, ha='right')
+    # -------------------------
+    # Radar chart
+    # --------------------------
+    # Vega-Lite has no polar line mark, so the radar is projected to x/y here.
+    # Radius starts at r_min so negative z-scores still sit inside the circle.
+    # A missing z-score (e.g. no shots after a recovery) leaves a gap in the
+    # outline instead of joining its neighbours, and that player is not filled.
+
+    metrics = plot_df.columns.tolist()
+    angles = np.linspace(0, 2 * np.pi, len(metrics), endpoint=False)
+    metric_angle = dict(zip(metrics, angles))
+    metric_order = {metric: i for i, metric in enumerate(metrics)}
+
+    r_min = np.floor(np.fmin(z_long['z_score'].min(), -1))
+    r_outer = np.ceil(np.fmax(z_long['z_score'].max(), 1)) - r_min
+
+    radar_df = z_long.copy()
+    radar_df['order'] = radar_df['metric'].map(metric_order)
+    # repeat each player's first metric at the end to close the loop
+    first_points = radar_df[radar_df['order'] == 0].assign(order=len(metrics))
+    radar_df = (
+        pd.concat([radar_df, first_points], ignore_index=True)
+        .sort_values(['player_name', 'order'])
+    )
 
-ax.set_ylabel("Z-Score")
-ax.set_title("Player Comparison — Z-Score Analysis")
-ax.legend()
+    # every missing value starts a new line segment
+    radar_df['segment'] = radar_df['z_score'].isna().groupby(radar_df['player_name']).cumsum()
+    complete_player = radar_df.groupby('player_name')['z_score'].transform(lambda z: z.notna().all())
+
+    radius = radar_df['z_score'] - r_min
+    radar_df['x'] = radius * np.sin(radar_df['metric'].map(metric_angle))
+    radar_df['y'] = radius * np.cos(radar_df['metric'].map(metric_angle))
+
+    ring_angles = np.linspace(0, 2 * np.pi, 73)
+    zero_ring = pd.DataFrame({
+        'x': -r_min * np.sin(ring_angles),
+        'y': -r_min * np.cos(ring_angles),
+        'order': np.arange(len(ring_angles)),
+    })
+
+    metric_labels = pd.DataFrame({
+        'metric': metrics,
+        'x': (r_outer + 0.6) * np.sin(angles),
+        'y': (r_outer + 0.6) * np.cos(angles),
+    })
+
+    x_scale = alt.X('x:Q', axis=None, scale=alt.Scale(domain=[-r_outer - 1.5, r_outer + 1.5]))
+    y_scale = alt.Y('y:Q', axis=None, scale=alt.Scale(domain=[-r_outer - 1.5, r_outer + 1.5]))
+
+    highlight = player_highlight()
+
+    radar_lines = (
+        alt.Chart(radar_df.dropna(subset=['z_score']))
+        .mark_line(point=True)
+        .encode(
+            x=x_scale,
+            y=y_scale,
+            order='order:Q',
+            detail='segment:N',
+            color=alt.Color('player_name:N', title="Player"),
+            opacity=alt.condition(highlight, alt.value(1.0), alt.value(0.15)),
+            tooltip=['player_name', 'metric', alt.Tooltip('z_score:Q', format='.2f')],
+        )
+        .add_params(highlight)
+    )
 
-st.pyplot(fig)
+    radar_fill = (
+        alt.Chart(radar_df[complete_player])
+        .mark_line(filled=True, strokeOpacity=0)
+        .encode(
+            x=x_scale,
+            y=y_scale,
+            order='order:Q',
+            color=alt.Color('player_name:N', title="Player"),
+            fillOpacity=alt.condition(highlight, alt.value(0.1), alt.value(0.02)),
+        )
+    )
 
-# -------------------------
-# Radar chart
-# --------------------------
+    zero_line = (
+        alt.Chart(zero_ring)
+        .mark_line(strokeDash=[4, 4], color='gray')
+        .encode(x=x_scale, y=y_scale, order='order:Q')
+    )
 
-metrics = plot_df.columns.tolist()
-angles = np.linspace(0, 2 * np.pi, len(metrics), endpoint=False).tolist()
-angles += angles[:1]  # close the loop
+    labels = (
+        alt.Chart(metric_labels)
+        .mark_text(fontSize=11)
+        .encode(x=x_scale, y=y_scale, text='metric:N')
+    )
 
-fig, ax = plt.subplots(figsize=(7, 7), subplot_kw=dict(polar=True))
+    st.altair_chart(
+        (zero_line + radar_fill + radar_lines + labels)
+        .properties(title="Player Z-Score Radar Comparison", width=500, height=500)
+        .configure_view(stroke=None)
+    )
 
-for player in plot_df.index:
-    values = plot_df.loc[player].tolist()
-    values += values[:1]  # close the loop
-    ax.plot(angles, values, label=player)
-    ax.fill(angles, values, alpha=0.1)
+    plot_df['overall_z_score'] = plot_df.mean(axis=1)
 
-ax.set_thetagrids(np.degrees(angles[:-1]), metrics)
-ax.set_title("Player Z-Score Radar Comparison")
-ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1))
+    st.subheader("Overall Z-Score Ranking")
+    st.write(
+        plot_df[['overall_z_score']]
+        .sort_values('overall_z_score', ascending=False)
+        .round(2)
+    )
 
-st.pyplot(fig)
+    highlight = player_highlight()
+
+    ranking_chart = (
+        alt.Chart(plot_df[['overall_z_score']].round(3).reset_index())
+        .mark_bar()
+        .encode(
+            x=alt.X('overall_z_score:Q', title="Overall Z-Score"),
+            y=alt.Y('player_name:N', sort='-x', title=None),
+            color=alt.Color('player_name:N', title="Player"),
+            opacity=alt.condition(highlight, alt.value(1.0), alt.value(0.2)),
+            tooltip=['player_name', alt.Tooltip('overall_z_score:Q', format='.2f')],
+        )
+        .add_params(highlight)
+    )
 
-plot_df['overall_z_score'] = plot_df.mean(axis=1)
+    st.altair_chart(ranking_chart, width="stretch")
 
-st.subheader("Overall Z-Score Ranking")
-st.write(
-    plot_df[['overall_z_score']]
-    .sort_values('overall_z_score', ascending=False)
-    .round(2)
-)
 
 # -----------------------------------------------------------------------------
-#  4. Build per-player stats for France (to use for z-scores)
+#  4. Build per-player stats for any teams / matches (to use for z-scores)
 # -----------------------------------------------------------------------------
 st.header("Player Comparison using Z-Score")
 
-# Ensure we have only France players with names
-players = sorted(df_events_fr['player_name'].dropna().unique())
+# Stats come from the per-match aggregates in the event store, so adding a
+# match only ingests that one match; everything else is already summed up.
+df_match["match_label"] = (
+    df_match["home_team_name"] + " vs " + df_match["away_team_name"]
+    + " (" + df_match["competition_stage_name"] + ")"
+)
+match_labels = dict(zip(df_match["match_id"], df_match["match_label"]))
 
-# Base index for stats
-stats_index = pd.Index(players, name="player_name")
-player_stats = pd.DataFrame(index=stats_index)
+# Default to every match already in the store, so the z-scores are not
+# built from a single game unless nothing else has been cached yet.
+cached_ids = [m for m in event_store.cached_match_ids() if m in match_labels]
 
-# --- Basic stats from events ---
-# Shots
-shot_events = df_events_fr[df_events_fr['type_name'] == 'Shot']
-player_stats['shots'] = (
-    shot_events.groupby('player_name').size()
-    .reindex(stats_index, fill_value=0)
+all_matches = st.toggle("All 2018 World Cup matches")
+if all_matches:
+    compare_match_ids = list(match_labels)
+else:
+    compare_match_ids = st.multiselect(
+        "Select Matches",
+        options=list(match_labels),
+        default=cached_ids or [selected_match_id],
+        format_func=lambda x: match_labels[x]
+    )
+
+if not compare_match_ids:
+    st.info("Select at least one match to build player stats.")
+    st.stop()
+
+compare_match_ids = cache_matches(compare_match_ids)
+
+if not compare_match_ids:
+    st.info("None of the selected matches could be loaded.")
+    st.stop()
+
+all_player_stats = event_store.load_player_stats(compare_match_ids)
+
+compare_teams = st.multiselect(
+    "Select Teams",
+    options=sorted(all_player_stats['team_name'].dropna().unique()),
+    default=[teamplay_name] if teamplay_name in set(all_player_stats['team_name']) else None
 )
 
-# Shots on target (if column exists)
-if 'shot_outcome_name' in df_events_fr.columns:
-    shots_ontarget = shot_events[shot_events['shot_outcome_name'] == 'On target']
-    player_stats['shots_on_target'] = (
-        shots_ontarget.groupby('player_name').size()
-        .reindex(stats_index, fill_value=0)
-    )
-else:
-    player_stats['shots_on_target'] = 0
+compare_positions = st.multiselect(
+    "Select Positions (empty = all)",
+    options=sorted(all_player_stats['position_name'].dropna().unique())
+)
 
-# xG (if column exists)
-if 'shot_statsbomb_xg' in df_events_fr.columns:
-    player_stats['xg'] = (
-        shot_events.groupby('player_name')['shot_statsbomb_xg'].sum()
-        .reindex(stats_index, fill_value=0.0)
-    )
-else:
-    player_stats['xg'] = 0.0
+standardise_by = st.radio(
+    "Standardise within",
+    options=["All selected players", "Position"],
+    horizontal=True
+)
+
+player_stats = all_player_stats[all_player_stats['team_name'].isin(compare_teams)].copy()
+if compare_positions:
+    player_stats = player_stats[player_stats['position_name'].isin(compare_positions)]
 
-# Passes
-pass_events = df_events_fr[df_events_fr['type_name'] == 'Pass']
-player_stats['passes'] = (
-    pass_events.groupby('player_name').size()
-    .reindex(stats_index, fill_value=0)
+# One label per (team, player): nickname where available plus the team,
+# with the player_id only to split the rare label that is still shared
+player_stats['player_label'] = (
+    player_stats['player_nickname'].fillna(player_stats['player_name'])
+    + " (" + player_stats['team_name'] + ")"
 )
+shared_label = player_stats['player_label'].duplicated(keep=False)
+player_stats.loc[shared_label, 'player_label'] += (
+    " #" + player_stats.loc[shared_label, 'player_id'].astype(str)
+)
+player_stats = player_stats.set_index('player_label')
 
-# Key passes (shot assists)
-if 'pass_shot_assist' in df_events_fr.columns:
-    key_pass_events = pass_events[pass_events['pass_shot_assist'] == True]
-    player_stats['key_passes'] = (
-        key_pass_events.groupby('player_name').size()
-        .reindex(stats_index, fill_value=0)
-    )
-else:
-    player_stats['key_passes'] = 0
+metrics_available = event_store.PLAYER_STAT_COLUMNS
 
-# You can add more metrics here if you like
-metrics_available = ['shots', 'shots_on_target', 'xg', 'passes', 'key_passes']
+st.write("**Raw per-player stats**")
+st.dataframe(player_stats.drop(columns=['player_id', 'player_nickname']))
 
-st.write("**Raw per-player stats (France)**")
-st.dataframe(player_stats)
+if player_stats.empty:
+    st.info("No players match the selected teams and positions.")
+    st.stop()
 
 # -----------------------------------------------------------------------------
-# 🔹 5. Compute z-scores across France squad
+# 🔹 5. Compute z-scores across the selected players
 # -----------------------------------------------------------------------------
-# We compute z-scores column by column
-z_stats = player_stats.copy().astype(float)
-
-for col in metrics_available:
-    if z_stats[col].nunique() > 1:
-        # normal z-score (mean 0, std 1)
-        z_stats[col] = stats.zscore(z_stats[col], nan_policy='omit')
-    else:
-        # if all values are same, z-score is not meaningful -> set 0
-        z_stats[col] = 0.0
-
-st.write("**Per-player Z-Scores (standardised within France squad)**")
+# One matrix operation for all players and metrics at once;
+# constant columns (or position groups) get 0
+
+z_stats = event_store.batched_zscores(
+    player_stats,
+    metrics_available,
+    group_col='position_name' if standardise_by == "Position" else None
+)
+
+st.write(f"**Per-player Z-Scores (standardised within {standardise_by.lower()})**")
 st.dataframe(z_stats.style.background_gradient(axis=0))
 
 # -----------------------------------------------------------------------------
@@ -393,17 +591,9 @@ st.dataframe(z_stats.style.background_gradient(axis=0))
 # -----------------------------------------------------------------------------
 st.subheader("Compare Selected Players")
 
-# Use nicknames where available, but map back to player_name for stats
-df_lineup_fr['label'] = df_lineup_fr.apply(
-    lambda row: row['player_nickname'] if pd.notna(row['player_nickname']) else row['player_name'],
-    axis=1
-)
-
-player_label_to_name = dict(zip(df_lineup_fr['label'], df_lineup_fr['player_name']))
-
 selected_labels = st.multiselect(
     "Select Players to Compare",
-    options=sorted(df_lineup_fr['label'].unique()),
+    options=sorted(z_stats.index),
 )
 
 selected_metric_cols = st.multiselect(
@@ -413,10 +603,8 @@ selected_metric_cols = st.multiselect(
 )
 
 if selected_labels and selected_metric_cols:
-    selected_names = [player_label_to_name[label] for label in selected_labels]
-
     # Filter z-score table to just selected players & metrics
-    z_view = z_stats.loc[selected_names, selected_metric_cols]
+    z_view = z_stats.loc[selected_labels, selected_metric_cols]
 
     st.write("### Z-Score Table for Selected Players")
     st.dataframe(
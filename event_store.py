@@ -0,0 +1,436 @@
+import contextlib
+import glob
+import os
+import tempfile
+import threading
+import urllib.request
+
+import duckdb
+import ijson
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# ------------------------------------------------------------
+# Parquet event store + DuckDB views
+# ------------------------------------------------------------
+# Every match is cached once as Parquet, one file per match:
+#   event_store/events/match_id=<id>/events.parquet
+#   event_store/lineups/match_id=<id>/lineups.parquet
+#   event_store/player_stats/match_id=<id>/player_stats.parquet
+#   event_store/matches/<competition_id>_<season_id>.parquet
+# The match_id lives in the directory name (hive partitioning), so a
+# WHERE match_id = ... only opens the files for that match, and Parquet
+# only reads the columns a query actually selects.
+
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "event_store")
+
+
+def _quote(path):
+    return path.replace("'", "''")
+
+
+def _match_path(table, match_id):
+    return os.path.join(STORE_DIR, table, f"match_id={int(match_id)}", f"{table}.parquet")
+
+
+@contextlib.contextmanager
+def _atomic_path(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # unique temp name, so two sessions caching the same match don't collide
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        yield tmp_path
+        # rename so a half-written file is never picked up by the views
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _write_parquet(con, frame, path):
+    con.register("frame", frame)
+    try:
+        with _atomic_path(path) as tmp_path:
+            con.execute(f"COPY frame TO '{_quote(tmp_path)}' (FORMAT PARQUET)")
+    finally:
+        con.unregister("frame")
+
+
+def is_cached(match_id):
+    return (
+        os.path.exists(_match_path("events", match_id))
+        and os.path.exists(_match_path("lineups", match_id))
+    )
+
+
+def has_player_stats(match_id):
+    return os.path.exists(_match_path("player_stats", match_id))
+
+
+def write_matches(df_match, competition_id, season_id):
+    path = os.path.join(STORE_DIR, "matches", f"{competition_id}_{season_id}.parquet")
+    if not os.path.exists(path):
+        with duckdb.connect() as con:
+            _write_parquet(con, df_match, path)
+
+
+def write_lineup(match_id, df_lineup):
+    # match_id comes back from the directory name
+    with duckdb.connect() as con:
+        _write_parquet(con, df_lineup.drop(columns=["match_id"], errors="ignore"),
+                       _match_path("lineups", match_id))
+
+
+def write_match(match_id, df_events, df_lineup):
+    if is_cached(match_id):
+        return
+    write_events_frame(match_id, df_events)
+    write_lineup(match_id, df_lineup)
+
+
+def ingest_match(parser, match_id, df_events=None, df_lineup=None, data_dir=None):
+    """Cache one match; pass df_events/df_lineup when Sbopen already loaded them."""
+    if not is_cached(match_id):
+        if df_events is not None:
+            write_events_frame(match_id, df_events)
+        else:
+            with open_events(match_id, data_dir=data_dir) as source:
+                write_events(match_id, source)
+        if df_lineup is None:
+            df_lineup = parser.lineup(match_id)
+        write_lineup(match_id, df_lineup)
+    write_player_stats(match_id)
+
+
+def cached_match_ids():
+    events_dir = os.path.join(STORE_DIR, "events")
+    if not os.path.isdir(events_dir):
+        return []
+    return sorted(
+        int(name.split("=", 1)[1])
+        for name in os.listdir(events_dir)
+        if name.startswith("match_id=") and is_cached(name.split("=", 1)[1])
+    )
+
+
+# ------------------------------------------------------------
+# Streaming event ingestion
+# ------------------------------------------------------------
+# Sbopen.event builds the full nested event table (plus related,
+# freeze frame and tactics tables) in one go. For bulk ingestion we
+# stream the raw StatsBomb JSON one event at a time with ijson, keep
+# only the columns the analysis uses and write them to Parquet in small
+# Arrow chunks, so neither a whole event dict nor the whole match is
+# ever held as Python objects.
+
+EVENTS_URL = "https://raw.githubusercontent.com/statsbomb/open-data/master/data/events/{match_id}.json"
+
+# seconds to wait on GitHub before giving up on a match
+REQUEST_TIMEOUT = 30
+
+# what a failed download / parse of one match can raise
+# (requests' exceptions are OSErrors too)
+INGEST_ERRORS = (OSError, ValueError, ijson.JSONError, duckdb.Error, pa.ArrowException)
+
+PASS_FLAGS = ['cross', 'cut_back', 'switch', 'shot_assist', 'goal_assist']
+
+# Same column names as Sbopen.event, so the views work either way.
+# Parquet dictionary-encodes the string columns on disk.
+EVENT_SCHEMA = pa.schema([
+    ('id', pa.string()),
+    ('index', pa.int32()),
+    ('period', pa.int8()),
+    ('minute', pa.int16()),
+    ('second', pa.int8()),
+    ('type_name', pa.string()),
+    ('team_name', pa.string()),
+    ('player_id', pa.int32()),
+    ('player_name', pa.string()),
+    ('position_name', pa.string()),
+    ('x', pa.float32()),
+    ('y', pa.float32()),
+    ('end_x', pa.float32()),
+    ('end_y', pa.float32()),
+    ('outcome_name', pa.string()),
+    ('shot_statsbomb_xg', pa.float32()),
+    *[(f'pass_{flag}', pa.bool_()) for flag in PASS_FLAGS],
+])
+
+
+def _name(event, key):
+    value = event.get(key)
+    return value['name'] if value else None
+
+
+def _append_event(chunk, event):
+    player = event.get('player') or {}
+    location = event.get('location') or (None, None)
+    shot = event.get('shot') or {}
+    pass_ = event.get('pass') or {}
+
+    # outcome and end_location sit under the type-specific key
+    # (shot, pass, carry, goalkeeper, duel, ...), like Sbopen flattens them
+    outcome = None
+    end_location = None
+    for value in event.values():
+        if isinstance(value, dict):
+            if outcome is None and 'outcome' in value:
+                outcome = value['outcome']['name']
+            if end_location is None and 'end_location' in value:
+                end_location = value['end_location']
+    end_location = end_location or (None, None)
+
+    chunk['id'].append(event['id'])
+    chunk['index'].append(event['index'])
+    chunk['period'].append(event['period'])
+    chunk['minute'].append(event['minute'])
+    chunk['second'].append(event['second'])
+    # Sbopen drops the trailing * as well
+    chunk['type_name'].append(event['type']['name'].replace('Ball Receipt*', 'Ball Receipt'))
+    chunk['team_name'].append(_name(event, 'team'))
+    chunk['player_id'].append(player.get('id'))
+    chunk['player_name'].append(player.get('name'))
+    chunk['position_name'].append(_name(event, 'position'))
+    chunk['x'].append(location[0])
+    chunk['y'].append(location[1])
+    chunk['end_x'].append(end_location[0])
+    chunk['end_y'].append(end_location[1])
+    chunk['outcome_name'].append(outcome)
+    chunk['shot_statsbomb_xg'].append(shot.get('statsbomb_xg'))
+    for flag in PASS_FLAGS:
+        chunk[f'pass_{flag}'].append(bool(pass_.get(flag)))
+
+
+def _chunk_table(chunk):
+    return pa.table(chunk, schema=EVENT_SCHEMA)
+
+
+def stream_events(fileobj, chunk_size=4096):
+    """Yield compact Arrow tables of at most chunk_size events from a StatsBomb event JSON file."""
+    chunk = {col: [] for col in EVENT_SCHEMA.names}
+    for event in ijson.items(fileobj, 'item', use_float=True):
+        _append_event(chunk, event)
+        if len(chunk['id']) >= chunk_size:
+            yield _chunk_table(chunk)
+            chunk = {col: [] for col in EVENT_SCHEMA.names}
+    if chunk['id']:
+        yield _chunk_table(chunk)
+
+
+def open_events(match_id, data_dir=None):
+    """Open one match's event JSON from a local open-data clone or GitHub."""
+    if data_dir is not None:
+        return open(os.path.join(data_dir, 'events', f'{int(match_id)}.json'), 'rb')
+    return urllib.request.urlopen(EVENTS_URL.format(match_id=int(match_id)), timeout=REQUEST_TIMEOUT)
+
+
+def write_events(match_id, fileobj, chunk_size=4096):
+    """Stream an event JSON file straight into the store, one chunk at a time."""
+    with _atomic_path(_match_path("events", match_id)) as tmp_path:
+        with pq.ParquetWriter(tmp_path, EVENT_SCHEMA) as writer:
+            for chunk in stream_events(fileobj, chunk_size=chunk_size):
+                writer.write_table(chunk)
+
+
+def write_events_frame(match_id, df_events):
+    """Store events already parsed by Sbopen.event, in the streamed layout."""
+    frame = df_events.reindex(columns=EVENT_SCHEMA.names)
+    for flag in PASS_FLAGS:
+        frame[f'pass_{flag}'] = frame[f'pass_{flag}'].fillna(False).astype(bool)
+    frame['player_id'] = frame['player_id'].astype('Int32')
+    table = pa.Table.from_pandas(frame, schema=EVENT_SCHEMA, preserve_index=False)
+    with _atomic_path(_match_path("events", match_id)) as tmp_path:
+        pq.write_table(table, tmp_path)
+
+
+# ------------------------------------------------------------
+# Views
+# ------------------------------------------------------------
+
+def _glob(table):
+    return os.path.join(STORE_DIR, table, "*", f"{table}.parquet")
+
+
+def _table_globs():
+    return {
+        "events": _glob("events"),
+        "lineups": _glob("lineups"),
+        "player_stats": _glob("player_stats"),
+        "matches": os.path.join(STORE_DIR, "matches", "*.parquet"),
+    }
+
+DERIVED_VIEWS_SQL = """
+CREATE OR REPLACE VIEW recoveries AS
+SELECT
+    match_id, id, period, minute, second,
+    (period::INTEGER - 1) * 45 * 60 + minute::INTEGER * 60 + second AS event_time,
+    team_name, player_name, x, y
+FROM events
+WHERE type_name = 'Ball Recovery';
+
+-- Same logic as the pandas shots_with_recovery table in app.py.
+-- event_time only grows within a match, so the running max of the
+-- recovery times is the forward-filled last recovery.
+CREATE OR REPLACE VIEW shots AS
+WITH timed AS (
+    SELECT
+        *,
+        (period::INTEGER - 1) * 45 * 60 + minute::INTEGER * 60 + second AS event_time,
+        max(CASE WHEN type_name = 'Ball Recovery'
+                 THEN (period::INTEGER - 1) * 45 * 60 + minute::INTEGER * 60 + second END)
+            OVER (PARTITION BY match_id, player_name
+                  ORDER BY period, minute, second, "index"
+                  ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW) AS last_recovery_time
+    FROM events
+    WHERE type_name IN ('Ball Recovery', 'Shot')
+)
+SELECT
+    *,
+    last_recovery_time IS NOT NULL AS after_recovery,
+    event_time - last_recovery_time AS time_since_recovery
+FROM timed
+WHERE type_name = 'Shot';
+"""
+
+
+def connect():
+    con = duckdb.connect()
+    # read_parquet fails on an empty glob, so only expose what is cached
+    table_globs = _table_globs()
+    for table, pattern in table_globs.items():
+        if not glob.glob(pattern):
+            continue
+        hive = "true" if table != "matches" else "false"
+        con.execute(
+            f"CREATE OR REPLACE VIEW {table} AS "
+            f"SELECT * FROM read_parquet('{_quote(pattern)}', "
+            f"hive_partitioning = {hive}, union_by_name = true)"
+        )
+    if glob.glob(table_globs["events"]):
+        con.execute(DERIVED_VIEWS_SQL)
+    return con
+
+
+# Limits for ad-hoc dashboard queries on the shared server
+QUERY_MAX_ROWS = 10000
+QUERY_MEMORY_LIMIT = "1GB"
+QUERY_THREADS = 2
+QUERY_TIMEOUT = 30  # seconds
+
+
+def run_query(sql, max_rows=QUERY_MAX_ROWS, timeout=QUERY_TIMEOUT):
+    """Run one ad-hoc SELECT from the dashboard on a locked-down connection.
+
+    Returns the first max_rows rows and whether the result was cut off.
+    """
+    with connect() as con:
+        # only the store is readable: no other files, extensions or ATTACH,
+        # bounded memory and threads, and the query itself can't switch
+        # any of that back on
+        con.execute(f"SET allowed_directories = ['{_quote(STORE_DIR)}']")
+        con.execute("SET enable_external_access = false")
+        con.execute(f"SET memory_limit = '{QUERY_MEMORY_LIMIT}'")
+        con.execute(f"SET threads = {QUERY_THREADS}")
+        con.execute("SET lock_configuration = true")
+
+        statements = con.extract_statements(sql)
+        if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+            raise ValueError("Only a single SELECT statement is allowed.")
+
+        # one extra row tells us whether there was more
+        timer = threading.Timer(timeout, con.interrupt)
+        timer.start()
+        try:
+            result = con.sql(sql).limit(max_rows + 1).df()
+        finally:
+            timer.cancel()
+        return result.head(max_rows), len(result) > max_rows
+
+
+# ------------------------------------------------------------
+# Per-match player aggregates
+# ------------------------------------------------------------
+# One row per player per match, computed once when the match is
+# ingested. Comparisons across matches only re-sum these small tables,
+# so adding a match never touches the events of the others.
+
+PLAYER_STATS_SQL = """
+SELECT
+    e.team_name,
+    e.player_id,
+    e.player_name,
+    mode(e.position_name) AS position_name,
+    count(*) AS events,
+    count(*) FILTER (WHERE e.type_name = 'Shot') AS shots,
+    count(*) FILTER (WHERE e.type_name = 'Shot'
+                       AND e.outcome_name IN ('Goal', 'Saved', 'Saved To Post')) AS shots_on_target,
+    count(*) FILTER (WHERE e.type_name = 'Shot' AND e.outcome_name = 'Goal') AS goals,
+    coalesce(sum(e.shot_statsbomb_xg), 0) AS xg,
+    count(*) FILTER (WHERE e.type_name = 'Pass') AS passes,
+    count(*) FILTER (WHERE e.type_name = 'Pass' AND e.pass_shot_assist) AS key_passes,
+    count(*) FILTER (WHERE e.type_name = 'Ball Recovery') AS ball_recoveries,
+    count(*) FILTER (WHERE s.after_recovery) AS shots_after_recovery
+FROM events e
+LEFT JOIN shots s ON s.match_id = e.match_id AND s.id = e.id
+WHERE e.match_id = {match_id} AND e.player_name IS NOT NULL
+GROUP BY e.team_name, e.player_id, e.player_name
+"""
+
+PLAYER_STAT_COLUMNS = [
+    'shots', 'shots_on_target', 'goals', 'xg', 'passes',
+    'key_passes', 'ball_recoveries', 'shots_after_recovery',
+]
+
+
+def write_player_stats(match_id):
+    if has_player_stats(match_id):
+        return
+    path = _match_path("player_stats", match_id)
+    with connect() as con:
+        df_stats = con.execute(PLAYER_STATS_SQL.format(match_id=int(match_id))).df()
+        _write_parquet(con, df_stats, path)
+
+
+def load_player_stats(match_ids):
+    """Sum the cached per-match aggregates over match_ids, one row per player."""
+    ids = ", ".join(str(int(match_id)) for match_id in match_ids)
+    totals = ",\n    ".join(f"sum(p.{col}) AS {col}" for col in PLAYER_STAT_COLUMNS)
+    with connect() as con:
+        return con.execute(f"""
+            SELECT
+                p.team_name,
+                p.player_id,
+                p.player_name,
+                any_value(l.player_nickname)::VARCHAR AS player_nickname,
+                arg_max(p.position_name, p.events) AS position_name,
+                count(*) AS matches,
+                {totals}
+            FROM player_stats p
+            LEFT JOIN lineups l ON l.match_id = p.match_id AND l.player_id = p.player_id
+            WHERE p.match_id IN ({ids})
+            GROUP BY p.team_name, p.player_id, p.player_name
+            ORDER BY p.team_name, p.player_name
+        """).df()
+
+
+def batched_zscores(raw, metrics, group_col=None):
+    """Z-scores of every metric column in one matrix operation, optionally within groups.
+
+    If all values in a column (or group) are the same, the z-score is not
+    meaningful and is set to 0.
+    """
+    values = raw[metrics].to_numpy(dtype=float)
+
+    if group_col is None:
+        mean = values.mean(axis=0, keepdims=True)
+        std = values.std(axis=0, keepdims=True)
+    else:
+        grouped = raw.groupby(group_col, dropna=False)[metrics]
+        mean = grouped.transform('mean').to_numpy(dtype=float)
+        std = grouped.transform('std', ddof=0).to_numpy(dtype=float)
+
+    z = np.divide(values - mean, std, out=np.zeros_like(values), where=std > 0)
+    return pd.DataFrame(z, index=raw.index, columns=metrics)
@@ -0,0 +1,69 @@
+"""Peak memory and throughput of event ingestion, Sbopen vs streaming.
+
+    python tests/bench_ingest.py [n_events]
+
+Each path runs in a fresh subprocess on the same synthetic match file and
+reports the growth of the peak RSS over the process after imports.
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [HERE, os.path.dirname(HERE)]
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(mode, path, store_dir):
+    import event_store
+    from mplsoccer.soccer.statsbomb import flatten_event
+
+    event_store.STORE_DIR = store_dir
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "read":
+        with open(path, "rb") as f:
+            while f.read(1 << 16):
+                pass
+    elif mode == "sbopen":
+        # what Sbopen.event does after the download
+        with open(path, "rb") as f:
+            events = json.loads(f.read())
+        df_events, df_related, df_freeze, df_tactics = flatten_event(events, 1)
+    elif mode == "streaming":
+        with open(path, "rb") as f:
+            event_store.write_events(1, f)
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"peak_mb": _peak_rss_mb() - baseline, "seconds": elapsed}))
+
+
+def main(n_events):
+    from fake_statsbomb import write_events_json
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.json")
+        write_events_json(path, n_events)
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"{n_events} events, {size_mb:.1f} MB of JSON")
+        for mode in ["read", "sbopen", "streaming"]:
+            out = subprocess.run(
+                [sys.executable, __file__, "--run", mode, path, tmp],
+                capture_output=True, text=True, check=True,
+            ).stdout.splitlines()[-1]
+            result = json.loads(out)
+            print(f"{mode:>10}: peak +{result['peak_mb']:7.1f} MB  "
+                  f"{result['seconds']:6.2f} s  {n_events / result['seconds']:10,.0f} events/s")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--run"]:
+        run(*sys.argv[2:5])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 3500)
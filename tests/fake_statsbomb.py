@@ -0,0 +1,141 @@
+import json
+import random
+import uuid
+
+import numpy as np
+import pandas as pd
+
+# Synthetic StatsBomb open-data event files, shaped like the real ones
+# (nested type dicts, related events, shot freeze frames, tactics).
+
+TEAMS = [{"id": 771, "name": "France"}, {"id": 785, "name": "Croatia"}]
+POSITIONS = ["Goalkeeper", "Right Back", "Left Center Midfield", "Center Forward"]
+
+
+def _player(rng, team):
+    number = rng.randrange(1, 12)
+    return {"id": team["id"] * 100 + number, "name": f"{team['name']} Player {number}"}
+
+
+def _event(rng, index, type_name, team):
+    minute = index * 100 // 3500
+    return {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "index": index,
+        "period": 1 if minute < 45 else 2,
+        "timestamp": "00:12:34.567",
+        "minute": minute,
+        "second": index % 60,
+        "type": {"id": 30, "name": type_name},
+        "possession": index // 10,
+        "possession_team": team,
+        "play_pattern": {"id": 1, "name": "Regular Play"},
+        "team": team,
+        "player": _player(rng, team),
+        "position": {"id": 13, "name": rng.choice(POSITIONS)},
+        "location": [rng.uniform(0, 120), rng.uniform(0, 80)],
+        "duration": rng.uniform(0, 3),
+        "related_events": [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(2)],
+    }
+
+
+def make_events(n_events=3500, seed=0):
+    rng = random.Random(seed)
+    events = []
+    for i, team in enumerate(TEAMS):
+        events.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "index": i + 1, "period": 1, "timestamp": "00:00:00.000",
+            "minute": 0, "second": 0,
+            "type": {"id": 35, "name": "Starting XI"},
+            "possession": 1, "possession_team": team,
+            "play_pattern": {"id": 1, "name": "Regular Play"},
+            "team": team, "duration": 0.0,
+            "tactics": {"formation": 4231, "lineup": [
+                {"player": _player(rng, team), "position": {"id": 1, "name": "Goalkeeper"},
+                 "jersey_number": 1}
+                for _ in range(11)
+            ]},
+        })
+
+    for index in range(len(events) + 1, n_events + 1):
+        team = TEAMS[index % 2]
+        roll = rng.random()
+        if roll < 0.45:
+            event = _event(rng, index, "Pass", team)
+            event["pass"] = {
+                "recipient": _player(rng, team),
+                "length": rng.uniform(1, 40), "angle": rng.uniform(-3, 3),
+                "height": {"id": 1, "name": "Ground Pass"},
+                "end_location": [rng.uniform(0, 120), rng.uniform(0, 80)],
+                "body_part": {"id": 40, "name": "Right Foot"},
+            }
+            if rng.random() < 0.05:
+                event["pass"]["shot_assist"] = True
+            if rng.random() < 0.1:
+                event["pass"]["outcome"] = {"id": 9, "name": "Incomplete"}
+        elif roll < 0.75:
+            event = _event(rng, index, "Ball Receipt*", team)
+        elif roll < 0.93:
+            event = _event(rng, index, "Carry", team)
+            event["carry"] = {"end_location": [rng.uniform(0, 120), rng.uniform(0, 80)]}
+        elif roll < 0.95:
+            event = _event(rng, index, "Goal Keeper", team)
+            event["goalkeeper"] = {
+                "type": {"id": 33, "name": "Shot Saved"},
+                "outcome": {"id": 15, "name": "Success"},
+                "position": {"id": 44, "name": "Set"},
+                "end_location": [rng.uniform(0, 6), rng.uniform(36, 44)],
+            }
+        elif roll < 0.98:
+            event = _event(rng, index, "Ball Recovery", team)
+        else:
+            event = _event(rng, index, "Shot", team)
+            event["shot"] = {
+                "statsbomb_xg": rng.uniform(0, 0.8),
+                "end_location": [120.0, rng.uniform(36, 44), rng.uniform(0, 3)],
+                "outcome": {"id": 100, "name": rng.choice(["Goal", "Saved", "Off T"])},
+                "type": {"id": 87, "name": "Open Play"},
+                "technique": {"id": 93, "name": "Normal"},
+                "body_part": {"id": 40, "name": "Right Foot"},
+                "freeze_frame": [
+                    {"location": [rng.uniform(80, 120), rng.uniform(0, 80)],
+                     "player": _player(rng, t), "position": {"id": 1, "name": "Goalkeeper"},
+                     "teammate": t is team}
+                    for t in TEAMS for _ in range(5)
+                ],
+            }
+        events.append(event)
+    return events
+
+
+def write_events_json(path, n_events=3500, seed=0):
+    with open(path, "w") as f:
+        json.dump(make_events(n_events, seed), f, indent=4)
+
+
+# A few hand-written events in Sbopen.event column layout
+EVENTS = pd.DataFrame([
+    # id, index, period, minute, second, type_name, team_name, player_name
+    ("e1", 1, 1, 2, 10, "Ball Recovery", "France", "Paul Pogba"),
+    ("e2", 2, 1, 2, 40, "Shot", "France", "Paul Pogba"),
+    ("e3", 3, 1, 5, 0, "Shot", "France", "Antoine Griezmann"),
+    ("e4", 4, 1, 20, 0, "Ball Recovery", "Croatia", "Luka Modrić"),
+    ("e5", 5, 1, 30, 5, "Pass", "France", "Paul Pogba"),
+    ("e6", 6, 2, 50, 0, "Ball Recovery", "France", "Paul Pogba"),
+    ("e7", 7, 2, 58, 30, "Shot", "France", "Paul Pogba"),
+    ("e8", 8, 2, 60, 0, "Shot", "Croatia", "Luka Modrić"),
+], columns=["id", "index", "period", "minute", "second", "type_name", "team_name", "player_name"])
+EVENTS["match_id"] = 8658
+EVENTS["x"] = 100.0
+EVENTS["y"] = 40.0
+EVENTS["outcome_name"] = [None, "Goal", "Saved", None, None, None, "Off T", "Blocked"]
+EVENTS["shot_statsbomb_xg"] = [np.nan, 0.3, 0.1, np.nan, np.nan, np.nan, 0.05, 0.02]
+EVENTS["pass_shot_assist"] = [False, False, False, False, True, False, False, False]
+
+LINEUP = pd.DataFrame({
+    "player_id": [1, 2, 3],
+    "player_name": ["Paul Pogba", "Antoine Griezmann", "Luka Modrić"],
+    "player_nickname": [None, None, None],
+    "team_name": ["France", "France", "Croatia"],
+})
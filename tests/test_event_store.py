@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fake_statsbomb import EVENTS, LINEUP
+
+
+def pandas_shots_with_recovery(df_events):
+    # Same steps as the Recovery section in app.py
+    df_events = df_events.sort_values(['match_id', 'period', 'minute', 'second']).copy()
+    df_events['event_time'] = (
+        (df_events['period'] - 1) * 45 * 60
+        + df_events['minute'] * 60
+        + df_events['second']
+    )
+    df_events['recovery_time'] = np.where(
+        df_events['type_name'] == 'Ball Recovery',
+        df_events['event_time'],
+        np.nan
+    )
+    df_events['last_recovery_time'] = (
+        df_events
+        .groupby(['match_id', 'player_name'])['recovery_time']
+        .ffill()
+    )
+    shots = df_events[df_events['type_name'] == 'Shot'].copy()
+    shots['after_recovery'] = shots['last_recovery_time'].notna()
+    shots['time_since_recovery'] = shots['event_time'] - shots['last_recovery_time']
+    return shots
+
+
+def test_write_match_is_read_back_through_views(store):
+    store.write_match(8658, EVENTS, LINEUP)
+
+    assert store.is_cached(8658)
+    assert store.cached_match_ids() == [8658]
+    with store.connect() as con:
+        events = con.execute("SELECT * FROM events ORDER BY \"index\"").df()
+        lineups = con.execute("SELECT * FROM lineups").df()
+
+    assert list(events["id"]) == list(EVENTS["id"])
+    assert set(events["match_id"]) == {8658}
+    assert len(lineups) == len(LINEUP)
+
+
+def test_shots_view_matches_pandas_recovery_logic(store):
+    store.write_match(8658, EVENTS, LINEUP)
+    with store.connect() as con:
+        shots = con.execute("SELECT * FROM shots").df().set_index("id").sort_index()
+
+    expected = pandas_shots_with_recovery(EVENTS).set_index("id").sort_index()
+
+    assert list(shots.index) == list(expected.index)
+    assert list(shots["after_recovery"]) == list(expected["after_recovery"])
+    np.testing.assert_allclose(
+        shots["time_since_recovery"].astype(float),
+        expected["time_since_recovery"].astype(float),
+    )
+
+
+def test_recoveries_view(store):
+    store.write_match(8658, EVENTS, LINEUP)
+    with store.connect() as con:
+        recoveries = con.execute("SELECT id, event_time FROM recoveries ORDER BY id").df()
+
+    assert list(recoveries["id"]) == ["e1", "e4", "e6"]
+    assert list(recoveries["event_time"]) == [130, 1200, 5700]
+
+
+def test_connect_without_cached_matches(store):
+    with store.connect() as con:
+        tables = con.execute("SELECT view_name FROM duckdb_views() WHERE NOT internal").df()
+    assert tables.empty
+
+
+@pytest.mark.parametrize("sql", [
+    "DROP VIEW shots",
+    "SELECT 1; SELECT 2",
+    "COPY (SELECT * FROM events) TO 'out.csv'",
+    "ATTACH 'other.db'",
+])
+def test_run_query_rejects_non_select(store, sql):
+    store.write_match(8658, EVENTS, LINEUP)
+    with pytest.raises(ValueError):
+        store.run_query(sql)
+
+
+def test_run_query_cannot_read_outside_store(store):
+    import duckdb
+
+    store.write_match(8658, EVENTS, LINEUP)
+    shots, truncated = store.run_query("SELECT * FROM shots")
+    assert len(shots) == 4 and not truncated
+    with pytest.raises(duckdb.Error):
+        store.run_query("SELECT * FROM read_text('/etc/passwd')")
+
+
+def test_run_query_caps_rows(store):
+    store.write_match(8658, EVENTS, LINEUP)
+    result, truncated = store.run_query("SELECT * FROM events ORDER BY \"index\" DESC;", max_rows=3)
+    assert truncated
+    assert list(result["id"]) == ["e8", "e7", "e6"]
+
+    # a runaway cross join only produces the capped rows
+    result, truncated = store.run_query("SELECT * FROM events a, events b, events c, events d",
+                                        max_rows=100)
+    assert len(result) == 100 and truncated
+
+
+def test_run_query_limits_resources(store):
+    import duckdb
+
+    store.write_match(8658, EVENTS, LINEUP)
+    settings, _ = store.run_query("SELECT current_setting('threads') AS threads")
+    assert settings.loc[0, "threads"] == store.QUERY_THREADS
+
+    with pytest.raises(duckdb.Error):
+        store.run_query("SELECT count(*) FROM range(100000000000) a, range(1000) b", timeout=1)
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+import event_store
+from fake_statsbomb import EVENTS, LINEUP
+
+
+def player_events(match_id, rows):
+    df = pd.DataFrame(rows, columns=["id", "index", "minute", "type_name", "team_name",
+                                     "player_id", "player_name", "position_name",
+                                     "outcome_name", "shot_statsbomb_xg", "pass_shot_assist"])
+    df["period"] = 1
+    df["second"] = 0
+    df["match_id"] = match_id
+    return df
+
+
+MATCH_1 = player_events(1, [
+    ("m1", 1, 1, "Ball Recovery", "France", 1, "Paul Pogba", "Left Center Midfield", None, None, False),
+    ("m2", 2, 2, "Shot", "France", 1, "Paul Pogba", "Left Center Midfield", "Goal", 0.3, False),
+    ("m3", 3, 3, "Pass", "France", 1, "Paul Pogba", "Left Center Midfield", None, None, True),
+    ("m4", 4, 4, "Pass", "France", 1, "Paul Pogba", "Left Center Midfield", "Incomplete", None, False),
+    ("m5", 5, 5, "Shot", "France", 2, "Antoine Griezmann", "Center Forward", "Saved", 0.1, False),
+    ("m6", 6, 6, "Shot", "Croatia", 3, "Luka Modrić", "Right Center Midfield", "Off T", 0.05, False),
+    ("m7", 7, 7, "Starting XI", "Croatia", None, None, None, None, None, False),
+])
+
+MATCH_2 = player_events(2, [
+    ("n1", 1, 1, "Pass", "France", 1, "Paul Pogba", "Right Center Midfield", None, None, False),
+    ("n2", 2, 2, "Shot", "France", 1, "Paul Pogba", "Left Center Midfield", "Blocked", 0.2, False),
+    ("n3", 3, 3, "Pass", "France", 1, "Paul Pogba", "Left Center Midfield", None, None, False),
+])
+
+LINEUP_1 = pd.DataFrame({
+    "player_id": [1, 2, 3],
+    "player_name": ["Paul Pogba", "Antoine Griezmann", "Luka Modrić"],
+    "player_nickname": [None, None, "Luka Modrić"],
+    "team_name": ["France", "France", "Croatia"],
+})
+
+
+@pytest.fixture
+def two_matches(store):
+    store.write_match(1, MATCH_1, LINEUP_1)
+    store.write_match(2, MATCH_2, LINEUP_1)
+    store.write_player_stats(1)
+    store.write_player_stats(2)
+    return store
+
+
+def test_player_stats_per_match(two_matches):
+    with two_matches.connect() as con:
+        per_match = con.execute(
+            "SELECT * FROM player_stats WHERE match_id = 1 ORDER BY player_id"
+        ).df().set_index("player_name")
+
+    pogba = per_match.loc["Paul Pogba"]
+    assert pogba["shots"] == 1
+    assert pogba["goals"] == 1
+    assert pogba["shots_on_target"] == 1
+    assert pogba["passes"] == 2
+    assert pogba["key_passes"] == 1
+    assert pogba["ball_recoveries"] == 1
+    assert pogba["shots_after_recovery"] == 1
+    assert pogba["xg"] == pytest.approx(0.3)
+
+    griezmann = per_match.loc["Antoine Griezmann"]
+    assert griezmann["shots_on_target"] == 1
+    assert griezmann["goals"] == 0
+    assert griezmann["shots_after_recovery"] == 0
+
+    assert per_match.loc["Luka Modrić", "shots_on_target"] == 0
+    # events without a player are not counted
+    assert len(per_match) == 3
+
+
+def test_load_player_stats_sums_matches(two_matches):
+    totals = two_matches.load_player_stats([1, 2]).set_index("player_name")
+    pogba = totals.loc["Paul Pogba"]
+    assert pogba["matches"] == 2
+    assert pogba["shots"] == 2
+    assert pogba["passes"] == 4
+    assert pogba["xg"] == pytest.approx(0.5)
+    # position with the most events across matches
+    assert pogba["position_name"] == "Left Center Midfield"
+    assert totals.loc["Luka Modrić", "player_nickname"] == "Luka Modrić"
+
+    only_first = two_matches.load_player_stats([1]).set_index("player_name")
+    assert only_first.loc["Paul Pogba", "passes"] == 2
+
+
+def test_ingest_match_reuses_cached_events(store):
+    class OfflineParser:
+        def lineup(self, match_id):
+            raise AssertionError("lineup should not be fetched again")
+
+    store.write_match(8658, EVENTS, LINEUP)
+    store.ingest_match(OfflineParser(), 8658)
+    assert len(store.load_player_stats([8658])) == 3
+
+
+def test_ingest_match_uses_loaded_frames(store):
+    class OfflineParser:
+        def lineup(self, match_id):
+            raise AssertionError("lineup was already loaded")
+
+    assert not store.has_player_stats(8658)
+    store.ingest_match(OfflineParser(), 8658, df_events=EVENTS, df_lineup=LINEUP)
+    assert store.is_cached(8658)
+    assert store.has_player_stats(8658)
+    assert len(store.load_player_stats([8658])) == 3
+
+
+RAW = pd.DataFrame({
+    "position_name": ["CM", "CM", "CM", "CF", "CF", "GK"],
+    "shots": [1, 4, 2, 5, 3, 0],
+    "xg": [0.1, 0.5, 0.2, 1.2, 0.4, 0.0],
+    "passes": [50, 50, 50, 20, 30, 25],
+}, index=list("abcdef"))
+METRICS = ["shots", "xg", "passes"]
+
+
+def scipy_zscores(values):
+    if values.nunique() > 1:
+        return stats.zscore(values)
+    return np.zeros(len(values))
+
+
+def test_batched_zscores_match_scipy():
+    z = event_store.batched_zscores(RAW, METRICS)
+    for col in METRICS:
+        np.testing.assert_allclose(z[col], scipy_zscores(RAW[col]), err_msg=col)
+    assert list(z.index) == list(RAW.index)
+
+
+def test_batched_zscores_within_position():
+    z = event_store.batched_zscores(RAW, METRICS, group_col="position_name")
+    for position, group in RAW.groupby("position_name"):
+        for col in METRICS:
+            np.testing.assert_allclose(z.loc[group.index, col], scipy_zscores(group[col]),
+                                       err_msg=f"{position} {col}")
+    # constant within CM, and a single GK
+    assert (z.loc[["a", "b", "c"], "passes"] == 0).all()
+    assert (z.loc["f"] == 0).all()
+
+
+def test_batched_zscores_constant_column():
+    raw = RAW.assign(passes=10)
+    z = event_store.batched_zscores(raw, METRICS)
+    assert (z["passes"] == 0).all()
+    assert np.isfinite(z.to_numpy()).all()
@@ -0,0 +1,138 @@
+import io
+import json
+import math
+
+import numpy as np
+import pytest
+
+from fake_statsbomb import make_events
+
+RAW_EVENTS = [
+    {
+        "id": "a1", "index": 1, "period": 1, "minute": 0, "second": 0,
+        "type": {"id": 35, "name": "Starting XI"},
+        "team": {"id": 771, "name": "France"},
+        "tactics": {"formation": 4231, "lineup": []},
+    },
+    {
+        "id": "a2", "index": 2, "period": 1, "minute": 1, "second": 5,
+        "type": {"id": 30, "name": "Pass"},
+        "team": {"id": 771, "name": "France"},
+        "player": {"id": 3961, "name": "Paul Pogba"},
+        "position": {"id": 13, "name": "Right Center Midfield"},
+        "location": [60.0, 40.0],
+        "pass": {"end_location": [100.0, 30.0], "shot_assist": True, "cross": True},
+    },
+    {
+        "id": "a3", "index": 3, "period": 1, "minute": 1, "second": 7,
+        "type": {"id": 42, "name": "Ball Receipt*"},
+        "team": {"id": 771, "name": "France"},
+        "player": {"id": 3009, "name": "Kylian Mbappé Lottin"},
+        "location": [100.0, 30.0],
+        "ball_receipt": {"outcome": {"id": 9, "name": "Incomplete"}},
+    },
+    {
+        "id": "a4", "index": 4, "period": 1, "minute": 1, "second": 9,
+        "type": {"id": 43, "name": "Carry"},
+        "team": {"id": 771, "name": "France"},
+        "player": {"id": 3009, "name": "Kylian Mbappé Lottin"},
+        "location": [100.0, 30.0],
+        "carry": {"end_location": [105.5, 32.5]},
+    },
+    {
+        "id": "a6", "index": 6, "period": 2, "minute": 60, "second": 2,
+        "type": {"id": 23, "name": "Goal Keeper"},
+        "team": {"id": 785, "name": "Croatia"},
+        "player": {"id": 3520, "name": "Danijel Subašić"},
+        "location": [2.0, 40.0],
+        "goalkeeper": {
+            "type": {"id": 33, "name": "Shot Saved"},
+            "outcome": {"id": 15, "name": "Success"},
+            "end_location": [3.5, 41.0],
+        },
+    },
+    {
+        "id": "a5", "index": 5, "period": 2, "minute": 58, "second": 30,
+        "type": {"id": 16, "name": "Shot"},
+        "team": {"id": 771, "name": "France"},
+        "player": {"id": 3961, "name": "Paul Pogba"},
+        "location": [98.0, 42.0],
+        "shot": {
+            "statsbomb_xg": 0.0743,
+            "end_location": [120.0, 38.5, 0.4],
+            "outcome": {"id": 97, "name": "Goal"},
+        },
+    },
+]
+
+
+def stream(events, **kwargs):
+    import event_store
+
+    return list(event_store.stream_events(io.BytesIO(json.dumps(events).encode()), **kwargs))
+
+
+def test_stream_events_field_mapping():
+    import event_store
+
+    (table,) = stream(RAW_EVENTS)
+    assert table.schema == event_store.EVENT_SCHEMA
+    rows = {row["id"]: row for row in table.to_pylist()}
+
+    assert rows["a1"]["player_name"] is None
+    assert rows["a1"]["x"] is None and rows["a1"]["end_x"] is None
+
+    assert rows["a2"]["pass_shot_assist"] and rows["a2"]["pass_cross"]
+    assert not rows["a2"]["pass_switch"]
+    assert rows["a2"]["outcome_name"] is None
+    assert (rows["a2"]["end_x"], rows["a2"]["end_y"]) == (100.0, 30.0)
+    assert rows["a2"]["position_name"] == "Right Center Midfield"
+
+    # outcome under the type-specific key, Sbopen's type name
+    assert rows["a3"]["type_name"] == "Ball Receipt"
+    assert rows["a3"]["outcome_name"] == "Incomplete"
+
+    # carry end_location when there is no pass or shot
+    assert (rows["a4"]["end_x"], rows["a4"]["end_y"]) == (105.5, 32.5)
+
+    assert rows["a5"]["outcome_name"] == "Goal"
+    assert math.isclose(rows["a5"]["shot_statsbomb_xg"], 0.0743, rel_tol=1e-6)
+    assert (rows["a5"]["end_x"], rows["a5"]["end_y"]) == (120.0, 38.5)
+    assert not any(rows["a5"][f"pass_{flag}"] for flag in event_store.PASS_FLAGS)
+
+    # goalkeeper events carry their own outcome and end_location
+    assert rows["a6"]["outcome_name"] == "Success"
+    assert (rows["a6"]["end_x"], rows["a6"]["end_y"]) == (3.5, 41.0)
+
+
+def test_stream_events_chunks():
+    tables = stream(RAW_EVENTS, chunk_size=2)
+    assert [t.num_rows for t in tables] == [2, 2, 2]
+    assert [row["id"] for t in tables for row in t.to_pylist()] == ["a1", "a2", "a3", "a4", "a6", "a5"]
+
+
+def test_streamed_and_sbopen_events_store_the_same(store):
+    flatten_event = pytest.importorskip("mplsoccer.soccer.statsbomb").flatten_event
+
+    raw = make_events(400)
+    store.write_events(1, io.BytesIO(json.dumps(raw).encode()), chunk_size=64)
+    df_events, _, _, _ = flatten_event(json.loads(json.dumps(raw)), 2)
+    store.write_events_frame(2, df_events)
+
+    with store.connect() as con:
+        streamed, sbopen = (
+            con.execute(f"SELECT * EXCLUDE (match_id) FROM events WHERE match_id = {match_id} "
+                        "ORDER BY \"index\"").df()
+            for match_id in (1, 2)
+        )
+
+    # every type with an end_location is covered
+    assert {"Pass", "Carry", "Shot", "Goal Keeper"} <= set(streamed["type_name"])
+    assert streamed.loc[streamed["type_name"] == "Goal Keeper", "end_x"].notna().all()
+
+    assert list(streamed.columns) == list(sbopen.columns)
+    for col in streamed.columns:
+        if streamed[col].dtype.kind == "f":
+            np.testing.assert_allclose(streamed[col], sbopen[col], rtol=1e-6, err_msg=col)
+        else:
+            assert streamed[col].fillna(-1).tolist() == sbopen[col].fillna(-1).tolist(), col